@@ -1,4 +1,4 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, Response
 import os
 from werkzeug.utils import secure_filename
 import uuid
@@ -8,6 +8,19 @@ from utils.visualization import (
     create_power_spectrum_plot,
     create_combined_plot
 )
+from utils.http_cache import (
+    MIN_COMPRESS_SIZE,
+    choose_encoding,
+    compress,
+    etag_matches,
+    file_digest,
+    load_cached,
+    make_etag,
+    remove_cached,
+    store_cached,
+    store_variant,
+    variant_etag
+)
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'default_secret_key')
@@ -22,6 +35,33 @@ if not os.path.exists(UPLOAD_FOLDER):
 
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 
+# Configure cache folder for analysis results
+CACHE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+
+# Create cache folder if it doesn't exist
+if not os.path.exists(CACHE_FOLDER):
+    os.makedirs(CACHE_FOLDER)
+
+app.config['CACHE_FOLDER'] = CACHE_FOLDER
+
+# Number of dominant cycles reported by the analysis
+MAX_CYCLES = 5
+
+# Parameters that shape the analysis output; they are part of the ETag,
+# so bump the version whenever the analysis or plots change
+ANALYSIS_PARAMS = {'version': 1, 'max_cycles': MAX_CYCLES}
+
+# Results are derived from private uploads and the URL is not tied to the
+# file content, so browsers must revalidate with the ETag on every use
+ANALYSIS_CACHE_CONTROL = 'private, no-cache'
+
+# Example datasets can be regenerated, so only cache them for a day
+EXAMPLES_CACHE_CONTROL = 'public, max-age=86400'
+
+# Compressed example datasets keyed by (path, encoding), holding
+# (mtime, size, body) so a regenerated file replaces its stale copy
+_compressed_examples = {}
+
 def allowed_file(filename):
     """Check if the file has an allowed extension."""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -83,6 +123,82 @@ def results():
     # Render the results template
     return render_template('results.html', filename=filename)
 
+def build_analysis(file_path):
+    """Run the analysis and build the JSON payload for the results page."""
+    # Analyze the stock data
+    results = analyze_stock_data(file_path, max_cycles=MAX_CYCLES)
+    
+    # Create visualizations
+    time_series_plot = create_time_series_plot(
+        results['uniform_dates'], 
+        results['uniform_prices']
+    )
+    power_spectrum_plot = create_power_spectrum_plot(
+        results['frequencies'],
+        results['power_spectrum']
+    )
+    combined_plot = create_combined_plot(
+        results['uniform_dates'],
+        results['uniform_prices'],
+        results['frequencies'],
+        results['power_spectrum']
+    )
+    
+    # Format dominant cycles for display
+    dominant_cycles_display = []
+    for period, power in results['dominant_cycles']:
+        if period >= 1:
+            # For periods of days or longer
+            if period >= 365:
+                years = period / 365
+                period_display = f"{years:.1f} years"
+            elif period >= 30:
+                months = period / 30
+                period_display = f"{months:.1f} months"
+            else:
+                period_display = f"{period:.1f} days"
+        else:
+            # For periods less than a day
+            hours = period * 24
+            period_display = f"{hours:.1f} hours"
+        
+        # Format power as percentage of maximum
+        power_display = f"{power * 100:.1f}%"
+        
+        dominant_cycles_display.append({
+            'period': period_display,
+            'power': power_display
+        })
+    
+    return {
+        'time_series_plot': time_series_plot,
+        'power_spectrum_plot': power_spectrum_plot,
+        'combined_plot': combined_plot,
+        'dominant_cycles': dominant_cycles_display
+    }
+
+def analysis_response(body, etag, encoding):
+    """Build a cacheable response for one representation of a result."""
+    response = Response(body, mimetype='application/json')
+    response.set_etag(variant_etag(etag, encoding))
+    response.headers['Cache-Control'] = ANALYSIS_CACHE_CONTROL
+    response.vary.add('Accept-Encoding')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+def not_modified_response(matched_etag):
+    """Build a 304 response carrying the ETag the client already holds."""
+    response = Response(status=304)
+    response.set_etag(matched_etag)
+    response.headers['Cache-Control'] = ANALYSIS_CACHE_CONTROL
+    response.vary.add('Accept-Encoding')
+    return response
+
+def analysis_etag(file_path):
+    """Return the ETag of the analysis result for an uploaded file."""
+    return make_etag(file_digest(file_path), ANALYSIS_PARAMS)
+
 @app.route('/api/analyze/<filename>')
 def analyze(filename):
     """API endpoint to analyze stock data."""
@@ -91,60 +207,82 @@ def analyze(filename):
         return jsonify({'error': 'File not found'}), 404
     
     try:
-        # Analyze the stock data
-        results = analyze_stock_data(file_path)
+        etag = analysis_etag(file_path)
+        encoding = choose_encoding(request.accept_encodings)
         
-        # Create visualizations
-        time_series_plot = create_time_series_plot(
-            results['uniform_dates'], 
-            results['uniform_prices']
-        )
-        power_spectrum_plot = create_power_spectrum_plot(
-            results['frequencies'],
-            results['power_spectrum']
-        )
-        combined_plot = create_combined_plot(
-            results['uniform_dates'],
-            results['uniform_prices'],
-            results['frequencies'],
-            results['power_spectrum']
-        )
+        # The client already has this result; skip the analysis entirely
+        matched_etag = etag_matches(request.if_none_match, etag, encoding)
+        if matched_etag:
+            return not_modified_response(matched_etag)
         
-        # Format dominant cycles for display
-        dominant_cycles_display = []
-        for period, power in results['dominant_cycles']:
-            if period >= 1:
-                # For periods of days or longer
-                if period >= 365:
-                    years = period / 365
-                    period_display = f"{years:.1f} years"
-                elif period >= 30:
-                    months = period / 30
-                    period_display = f"{months:.1f} months"
-                else:
-                    period_display = f"{period:.1f} days"
+        cache_dir = app.config['CACHE_FOLDER']
+        body = load_cached(cache_dir, etag, encoding)
+        if body is None:
+            identity = load_cached(cache_dir, etag, None)
+            if identity is None:
+                # Cache miss: analyze and store with precompressed copies
+                identity = app.json.dumps(build_analysis(file_path)).encode('utf-8')
+                body = store_cached(cache_dir, etag, identity)[encoding]
             else:
-                # For periods less than a day
-                hours = period * 24
-                period_display = f"{hours:.1f} hours"
-            
-            # Format power as percentage of maximum
-            power_display = f"{power * 100:.1f}%"
-            
-            dominant_cycles_display.append({
-                'period': period_display,
-                'power': power_display
-            })
+                # Entry predates this encoding being available
+                body = compress(identity, encoding)
+                store_variant(cache_dir, etag, encoding, body)
         
-        return jsonify({
-            'time_series_plot': time_series_plot,
-            'power_spectrum_plot': power_spectrum_plot,
-            'combined_plot': combined_plot,
-            'dominant_cycles': dominant_cycles_display
-        })
+        return analysis_response(body, etag, encoding)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.after_request
+def compress_examples(response):
+    """Compress example datasets and let browsers cache them."""
+    filename = (request.view_args or {}).get('filename', '')
+    if request.endpoint != 'static' or not filename.startswith('examples/'):
+        return response
+    if response.status_code not in (200, 206, 304):
+        return response
+    
+    response.headers['Cache-Control'] = EXAMPLES_CACHE_CONTROL
+    response.vary.add('Accept-Encoding')
+    
+    # Ranges are served from the identity file and keep its strong ETag
+    if response.status_code == 206:
+        return response
+    
+    encoding = choose_encoding(request.accept_encodings)
+    if not encoding:
+        return response
+    
+    # A weak validator still matches the identity ETag on revalidation
+    etag, _ = response.get_etag()
+    if etag:
+        response.set_etag(etag, weak=True)
+    
+    file_path = os.path.join(app.static_folder, filename)
+    if response.status_code != 200 or not os.path.isfile(file_path):
+        return response
+    
+    stat = os.stat(file_path)
+    if stat.st_size < MIN_COMPRESS_SIZE:
+        return response
+    
+    key = (file_path, encoding)
+    cached = _compressed_examples.get(key)
+    if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+        body = cached[2]
+    else:
+        with open(file_path, 'rb') as f:
+            body = compress(f.read(), encoding)
+        _compressed_examples[key] = (stat.st_mtime_ns, stat.st_size, body)
+    
+    # Replace the streamed file with the compressed copy
+    if hasattr(response.response, 'close'):
+        response.response.close()
+    response.direct_passthrough = False
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    response.headers.pop('Accept-Ranges', None)
+    return response
+
 @app.route('/api/examples')
 def get_examples():
     """API endpoint to get example datasets."""
@@ -169,11 +307,15 @@ def get_examples():
 
 @app.route('/cleanup', methods=['POST'])
 def cleanup_files():
-    """Clean up uploaded files."""
-    filename = request.json.get('filename')
+    """Clean up uploaded files and their cached analysis results."""
+    # sendBeacon posts the JSON body as text/plain, so don't rely on the mimetype
+    data = request.get_json(force=True, silent=True) or {}
+    filename = data.get('filename')
     if filename:
         file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
         if os.path.exists(file_path):
+            # Compute the ETag before the upload is gone
+            remove_cached(app.config['CACHE_FOLDER'], analysis_etag(file_path))
             os.remove(file_path)
     return jsonify({'success': True})
 
@@ -145,12 +145,13 @@ def find_dominant_cycles(frequencies, power_spectrum, max_cycles=5):
     
     return dominant_cycles
 
-def analyze_stock_data(file_path):
+def analyze_stock_data(file_path, max_cycles=5):
     """
     Analyze stock data using FFT.
     
     Parameters:
     file_path (str): Path to the CSV file containing stock data
+    max_cycles (int, optional): Maximum number of dominant cycles to return
     
     Returns:
     dict: Analysis results including time series, FFT, and dominant cycles
@@ -165,7 +166,7 @@ def analyze_stock_data(file_path):
     frequencies, power_spectrum = compute_fft(uniform_prices)
     
     # Find dominant cycles
-    dominant_cycles = find_dominant_cycles(frequencies, power_spectrum)
+    dominant_cycles = find_dominant_cycles(frequencies, power_spectrum, max_cycles=max_cycles)
     
     # Convert NumPy arrays to lists for JSON serialization
     result = {
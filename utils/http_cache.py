@@ -0,0 +1,206 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available
+    brotli = None
+
+# Encodings we can produce, in order of preference
+SUPPORTED_ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+# Responses smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 1024
+
+# Brotli quality used on the request path; the default of 11 takes
+# seconds on multi-megabyte results for little extra saving
+BROTLI_QUALITY = 5
+
+def file_digest(file_path):
+    """
+    Compute the SHA-256 digest of a file's content.
+
+    Parameters:
+    file_path (str): Path to the file
+
+    Returns:
+    str: Hex digest of the file content
+    """
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def make_etag(digest, params):
+    """
+    Build an entity tag from a content digest and analysis parameters.
+
+    Parameters:
+    digest (str): Hex digest of the input file
+    params (dict): Parameters that influence the analysis output
+
+    Returns:
+    str: Entity tag (without quotes) identifying the analysis result
+    """
+    sha = hashlib.sha256(digest.encode('ascii'))
+    sha.update(json.dumps(params, sort_keys=True).encode('utf-8'))
+    return sha.hexdigest()[:32]
+
+def variant_etag(etag, encoding):
+    """
+    Return the strong entity tag for one encoding of a resource.
+
+    Each content coding is a distinct representation, so it needs its own
+    strong validator.
+
+    Parameters:
+    etag (str): Entity tag of the uncompressed representation
+    encoding (str or None): Content coding, or None for identity
+
+    Returns:
+    str: Entity tag for the given representation
+    """
+    return f"{etag}-{encoding}" if encoding else etag
+
+def etag_matches(if_none_match, etag, encoding):
+    """
+    Check an If-None-Match header against every encoding of a resource.
+
+    If-None-Match uses weak comparison, so tags weakened by a proxy that
+    recompressed the response still match.
+
+    Parameters:
+    if_none_match (werkzeug.datastructures.ETags): Parsed request header
+    etag (str): Entity tag of the uncompressed representation
+    encoding (str or None): Content coding negotiated for this request,
+        used when the client sent ``*``
+
+    Returns:
+    str or None: Entity tag of the representation the client holds, or
+        None if it has no current representation
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.star_tag:
+        return variant_etag(etag, encoding)
+    for candidate in (None,) + SUPPORTED_ENCODINGS:
+        tag = variant_etag(etag, candidate)
+        if if_none_match.contains_weak(tag):
+            return tag
+    return None
+
+def choose_encoding(accept_encodings):
+    """
+    Pick the preferred content coding the client accepts.
+
+    Parameters:
+    accept_encodings (werkzeug.datastructures.Accept): Parsed
+        Accept-Encoding request header
+
+    Returns:
+    str or None: Content coding to use, or None for identity
+    """
+    for encoding in SUPPORTED_ENCODINGS:
+        if accept_encodings[encoding] > 0:
+            return encoding
+    return None
+
+def compress(data, encoding):
+    """
+    Compress data with the given content coding.
+
+    Parameters:
+    data (bytes): Uncompressed data
+    encoding (str): 'gzip' or 'br'
+
+    Returns:
+    bytes: Compressed data
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    # mtime=0 keeps the output deterministic for identical input
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+def _cache_path(cache_dir, etag, encoding):
+    """Return the on-disk path of one cached representation."""
+    suffix = {None: '', 'gzip': '.gz', 'br': '.br'}[encoding]
+    return os.path.join(cache_dir, f"{etag}.json{suffix}")
+
+def _write_atomic(path, data):
+    """Write data to path so concurrent readers never see a partial file."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def load_cached(cache_dir, etag, encoding):
+    """
+    Load a cached representation of an analysis result.
+
+    Parameters:
+    cache_dir (str): Directory holding cached results
+    etag (str): Entity tag of the uncompressed representation
+    encoding (str or None): Content coding, or None for identity
+
+    Returns:
+    bytes or None: Cached body, or None if it has not been stored
+    """
+    path = _cache_path(cache_dir, etag, encoding)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return f.read()
+
+def store_cached(cache_dir, etag, body):
+    """
+    Store an analysis result together with its precompressed copies.
+
+    Parameters:
+    cache_dir (str): Directory holding cached results
+    etag (str): Entity tag of the uncompressed representation
+    body (bytes): Uncompressed JSON body
+
+    Returns:
+    dict: Stored bodies keyed by content coding (None for identity)
+    """
+    bodies = {None: body}
+    for encoding in SUPPORTED_ENCODINGS:
+        bodies[encoding] = compress(body, encoding)
+    # Write the identity copy last; its presence marks a complete entry
+    for encoding in SUPPORTED_ENCODINGS + (None,):
+        _write_atomic(_cache_path(cache_dir, etag, encoding), bodies[encoding])
+    return bodies
+
+def store_variant(cache_dir, etag, encoding, body):
+    """
+    Store one compressed copy of an already cached analysis result.
+
+    Parameters:
+    cache_dir (str): Directory holding cached results
+    etag (str): Entity tag of the uncompressed representation
+    encoding (str): Content coding of body
+    body (bytes): Compressed JSON body
+    """
+    _write_atomic(_cache_path(cache_dir, etag, encoding), body)
+
+def remove_cached(cache_dir, etag):
+    """
+    Remove a cached analysis result and all its precompressed copies.
+
+    Parameters:
+    cache_dir (str): Directory holding cached results
+    etag (str): Entity tag of the uncompressed representation
+    """
+    for encoding in (None, 'gzip', 'br'):
+        path = _cache_path(cache_dir, etag, encoding)
+        if os.path.exists(path):
+            os.remove(path)